@@ -1,14 +1,28 @@
 import pickle
-from collections import UserDict
-from datetime import datetime, timedelta
+import pickletools
+from calendar import isleap
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from itertools import chain
 
 
 DATE_PATTERN = "%d.%m.%Y"
 
 
+def parse_date(value: str) -> date:
+    parts = value.split(".")
+    if len(parts) == 3:
+        day, month, year = parts
+        digits = day + month + year
+        if 1 <= len(day) <= 2 and 1 <= len(month) <= 2 and len(year) == 4 and digits.isascii() and digits.isdigit():
+            return date(int(year), int(month), int(day))
+    raise ValueError(f"Date '{value}' does not match format '{DATE_PATTERN}'.")
+
+
 def save_data(book, filename="book.pkl"):
+    data = pickletools.optimize(pickle.dumps(book, protocol=pickle.HIGHEST_PROTOCOL))
     with open(filename, "wb") as f:
-        pickle.dump(book, f)
+        f.write(data)
 
 
 def load_data(filename="book.pkl"):
@@ -33,8 +47,6 @@ def error_handler(func):
             return func(*args, **kwargs)        
         except (RequiredFieldError, FieldFormatError) as e:
             print(f"[ERROR] Validation failed: {e}")        
-        except ValueError:            
-            print("Phone number not found.")
         except KeyError:            
             print("Contact not found.")
         except Exception as e:
@@ -44,14 +56,26 @@ def error_handler(func):
 
 
 class Field:
+    __slots__ = ("value",)
+
     def __init__(self, value: str):
         self.value = value
 
     def __str__(self):
         return str(self.value)
 
+    def __reduce__(self):
+        return self.__class__, (self.value,)
+
+    def __setstate__(self, state):
+        # Books saved before fields had __slots__ pickled their __dict__; rebuild through __init__
+        # so values derived on construction, like Birthday.date, are restored too.
+        self.__init__(state["value"])
+
 
 class Name(Field):
+    __slots__ = ()
+
     def __init__(self, value: str):
         if len(value.strip()) == 0:
             raise RequiredFieldError("Required not empty field.")
@@ -59,65 +83,79 @@ class Name(Field):
 
 
 class Phone(Field):
+    # Records keep numbers as plain strings; Phone is still needed to load books that stored Phone objects.
+    __slots__ = ()
+
     def __init__(self, value: str):
-        if len(value) != 10 or not all(c.isdigit() for c in value):
-            raise FieldFormatError("Must be exactly 10 digits.")
+        validate_phone(value)
         super().__init__(value)
 
 
 class Birthday(Field):
+    __slots__ = ("date",)
+
     def __init__(self, value: str):
         try:
-            datetime.strptime(value, "%d.%m.%Y")            
+            self.date = parse_date(value)
         except ValueError:
             raise FieldFormatError("Invalid date format. Use DD.MM.YYYY")
         super().__init__(value)
 
 class Record:
+    __slots__ = ("name", "phones", "_phones_info", "birthday")
+
     def __init__(self, name: str):
         self.name = Name(name)
-        self.phones = []
+        self.phones = {}
+        self._phones_info = None
         self.birthday = None
     
     def __str__(self):
-        return f"Contact name: {self.name.value}, phones: {'; '.join(p.value for p in self.phones)}"
+        return f"Contact name: {self.name.value}, phones: {'; '.join(self.phones)}"
+
+    def __getstate__(self):
+        return {"name": self.name, "phones": self.phones, "birthday": self.birthday}
+
+    def __setstate__(self, state):
+        phones = state["phones"]
+        # Books saved before phones became plain strings keep a list of Phone objects.
+        if isinstance(phones, list):
+            phones = dict.fromkeys(phone.value for phone in phones)
+
+        self.name = state["name"]
+        self.phones = phones
+        self._phones_info = None
+        self.birthday = state["birthday"]
 
-    @error_handler
     def add_phone(self, phone_number: str):
-        phone = Phone(phone_number)
-        if phone and phone not in self.phones:
-            self.phones.append(Phone(phone_number))
+        validate_phone(phone_number)
+        if phone_number not in self.phones:
+            self.phones[phone_number] = None
+            self._phones_info = None
     
-    @error_handler
     def remove_phone(self, phone_number: str):
-        index = self.__get_phone_index(phone_number)
-        if index >= 0:
-            return self.phones.pop()
+        if phone_number in self.phones:
+            del self.phones[phone_number]
+            self._phones_info = None
+            return phone_number
 
-    @error_handler
     def edit_phone(self, old_phone_number: str, new_phone_number: str):
-        index = self.__get_phone_index(old_phone_number)
-        if index >= 0:
-            new_phone = Phone(new_phone_number)
-            if new_phone:
-                self.phones[index] = new_phone
+        if old_phone_number in self.phones:
+            validate_phone(new_phone_number)
+            self.phones = {
+                new_phone_number if phone == old_phone_number else phone: None for phone in self.phones
+            }
+            self._phones_info = None
 
-    @error_handler    
     def find_phone(self, phone_number: str):    
-        index = self.__get_phone_index(phone_number)
-        if index >= 0:        
-            return self.phones[index]
-
-    def __get_phone_index(self, phone_number: str):
-        for index in range(0, len(self.phones)):
-            if self.phones[index].value == phone_number:
-                return index
-        raise ValueError
+        if phone_number in self.phones:
+            return phone_number
     
     def phones_info(self):
-        return ', '.join(p.value for p in self.phones)
+        if self._phones_info is None:
+            self._phones_info = ', '.join(self.phones)
+        return self._phones_info
 
-    @error_handler
     def add_birthday(self, day: str):
         birthday = Birthday(day)
         if birthday:
@@ -127,43 +165,137 @@ class Record:
         return f"{self.name.value} was born in {self.birthday.value if self.birthday else 'N/A'}"
 
 
-class AddressBook(UserDict):
+class AddressBook(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._phones_widths = {name: len(record.phones_info()) for name, record in self.items()}
+        self.__update_phones_width()
+        self._birthdays = defaultdict(dict)
+        self._birthday_keys = {}
+        for name, record in self.items():
+            self.__index_birthday(name, record)
+
+    def __setitem__(self, name, record: Record):
+        super().__setitem__(name, record)
+        self.__set_phones_width(name, len(record.phones_info()))
+        self.__unindex_birthday(name)
+        self.__index_birthday(name, record)
+
+    def __delitem__(self, name):
+        super().__delitem__(name)
+        if self._phones_widths.pop(name) == self._max_phones_width:
+            self.__update_phones_width()
+        self.__unindex_birthday(name)
+
+    def pop(self, name, *default):
+        if name not in self:
+            return super().pop(name, *default)
+        record = self[name]
+        del self[name]
+        return record
+
+    def popitem(self):
+        if not self:
+            raise KeyError("popitem(): address book is empty")
+        name = next(reversed(self))
+        return name, self.pop(name)
+
+    def setdefault(self, name, default=None):
+        if name not in self:
+            self[name] = default
+        return self[name]
+
+    def update(self, *args, **kwargs):
+        for name, record in dict(*args, **kwargs).items():
+            self[name] = record
+
+    def clear(self):
+        super().clear()
+        self._phones_widths.clear()
+        self._max_phones_width = 0
+        self._birthdays.clear()
+        self._birthday_keys.clear()
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def __setstate__(self, state):
+        # Books saved while AddressBook was a UserDict keep their contacts under "data".
+        self.__init__(state.get("data", {}))
+
     def add_record(self, record: Record):
-        self.data[record.name.value] = record
-        return self.data[record.name.value]
+        self[record.name.value] = record
+        return self[record.name.value]
 
     @error_handler
     def find(self, name):
-        return self.data[name]
+        return self[name]
     
     @error_handler
     def delete(self, name):
-        self.data.pop(name)
+        self.pop(name)
+
+    def max_phones_width(self):
+        # Counts each record's phones as of its last add_record; re-add a record after changing its phones.
+        return self._max_phones_width
+
+    def __set_phones_width(self, name, width: int):
+        previous_width = self._phones_widths.get(name, 0)
+        self._phones_widths[name] = width
+        if width >= self._max_phones_width:
+            self._max_phones_width = width
+        elif previous_width == self._max_phones_width:
+            self.__update_phones_width()
+
+    def __update_phones_width(self):
+        self._max_phones_width = max(self._phones_widths.values(), default=0)
+
+    def __index_birthday(self, name, record: Record):
+        if record.birthday:
+            key = (record.birthday.date.month, record.birthday.date.day)
+            self._birthdays[key][name] = record
+            self._birthday_keys[name] = key
+
+    def __unindex_birthday(self, name):
+        # Use the key the record was indexed under; its birthday may have changed since.
+        key = self._birthday_keys.pop(name, None)
+        if key:
+            bucket = self._birthdays[key]
+            del bucket[name]
+            if not bucket:
+                del self._birthdays[key]
+
+    def __birthday_records(self, day: date):
+        records = list(self._birthdays.get((day.month, day.day), {}).values())
+        # Feb 29 birthdays are celebrated on Feb 28 in non-leap years.
+        if (day.month, day.day) == (2, 28) and not isleap(day.year):
+            records.extend(self._birthdays.get((2, 29), {}).values())
+        return records
 
     def get_upcoming_birthdays(self):
         greetings_list = []
-
-        current_date = datetime.today().date()
-        current_year = current_date.year
-
-        for record in self.data.values():
-            if not record.birthday:
-                continue
-
-            user_born_date = datetime.strptime(record.birthday.value, DATE_PATTERN).date()
-            birthday = datetime(current_year, user_born_date.month, user_born_date.day).date()
-
-            delta_days = (birthday - current_date).days
-            is_upcoming = delta_days >= 0 and delta_days <= 7
-
-            if is_upcoming:
-                extra_days = 0 if birthday.weekday() < 5 else (7 - birthday.weekday())
-                greetings_date = birthday + timedelta(extra_days)
-                user_greeting_data = {
-                    "name": record.name.value, 
-                    "congratulation_date": datetime.strftime(greetings_date, DATE_PATTERN)
-                }
-                greetings_list.append(user_greeting_data)
+        add_greeting = greetings_list.append
+        birthday_records = self.__birthday_records
+        date_pattern = DATE_PATTERN
+        one_day = timedelta(days=1)
+
+        birthday = datetime.today().date()
+
+        for _ in range(8):
+            records = birthday_records(birthday)
+            if records:
+                weekday = birthday.weekday()
+                extra_days = 0 if weekday < 5 else (7 - weekday)
+                greetings_date = (birthday + extra_days * one_day).strftime(date_pattern)
+
+                for record in records:
+                    user_greeting_data = {
+                        "name": record.name.value, 
+                        "congratulation_date": greetings_date
+                    }
+                    add_greeting(user_greeting_data)
+
+            birthday += one_day
             
         return greetings_list
 
@@ -194,19 +326,19 @@ def validate_arguments(args, expected):
 
 
 def validate_phone(value):
-    if len(value) != 10 or not all(c.isdigit() for c in value):
+    if len(value) != 10 or not value.isdigit():
         raise ValueError(f"Phone number format 10 digits: expected='XXXXXXXXXX', provided='{value}'.")
     
 
 def validate_date(value):
     try:
-        datetime.strptime(value, DATE_PATTERN)
+        parse_date(value)
     except ValueError:
         raise ValueError(f"Birthday date format is incorrect: expected='DD.MM.YYYY', provided='{value}'.")
         
 
-def validate_contact(name, names):    
-    if name not in names:        
+def validate_contact(name, book: AddressBook):
+    if name not in book:
         raise KeyError(f"Contact with name '{name}' does not exist.")
     
 
@@ -221,6 +353,7 @@ def add_contact(args, book: AddressBook):
 
     book.add_record(record)
     print("Contact added.")
+    return True
 
 
 @input_error
@@ -229,13 +362,17 @@ def change_contact(args, book: AddressBook):
     
     name, old_phone, new_phone = args
 
-    validate_contact(name, book.data.keys())
+    validate_contact(name, book)
     validate_phone(old_phone)
     validate_phone(new_phone)
 
     record: Record = book[name]
-    record.edit_phone(old_phone, new_phone)      
+    if not record.find_phone(old_phone):
+        raise KeyError(f"Contact '{name}' has no phone number '{old_phone}'.")
+    record.edit_phone(old_phone, new_phone)
+    book.add_record(record)
     print("Contact updated.")
+    return True
 
 
 @input_error
@@ -243,7 +380,7 @@ def show_phone(args, book: AddressBook):
     validate_arguments(args, 1)
     
     name, = args
-    validate_contact(name, book.data.keys())
+    validate_contact(name, book)
     print(f"Phones: {book.get(name).phones_list()}")
 
 
@@ -252,12 +389,14 @@ def add_birthday(args, book: AddressBook):
     validate_arguments(args, 2)
     
     name, date = args
-    validate_contact(name, book.data.keys())
+    validate_contact(name, book)
     validate_date(date)
 
     record: Record = book[name]
-    record.add_birthday(date)      
+    record.add_birthday(date)
+    book.add_record(record)
     print("Contact updated.")
+    return True
 
 
 @input_error
@@ -265,23 +404,24 @@ def show_birthday(args, book: AddressBook):
     validate_arguments(args, 1)
     
     name, = args
-    validate_contact(name, book.data.keys())
+    validate_contact(name, book)
     
     record: Record = book[name]    
     print(record.birthday_info())
 
 
 def show_all(book: AddressBook):
-    if not book.values():
+    if not book:
         print("There are no contacts.")
         return
     
-    size = max(len(record.phones_info()) for record in book.values()) + 4
+    size = book.max_phones_width() + 4
     dash_row = "-" * (size * 2 + 1)
-    header = [dash_row, f"{'NAME':^{size}}|{'PHONE':^{size}}", dash_row]
-    contacts_list = header + [f"{contact.name.value:<{size}}|{contact.phones_info():^{size}}" for contact in book.values()]    
+    header = (dash_row, f"{'NAME':^{size}}|{'PHONE':^{size}}", dash_row)
+    row_template = f"{{:<{size}}}|{{:^{size}}}"
+    contacts_rows = (row_template.format(contact.name.value, contact.phones_info()) for contact in book.values())
     
-    print("\n".join(contacts_list))
+    print("\n".join(chain(header, contacts_rows)))
 
 
 def show_upcoming_bitrhdays(book: AddressBook):
@@ -290,51 +430,42 @@ def show_upcoming_bitrhdays(book: AddressBook):
         print(f"Name: {item['name']}, Birthday: {item['congratulation_date']}")
 
 
+COMMANDS = {
+    "add": add_contact,
+    "change": change_contact,
+    "phone": show_phone,
+    "all": lambda args, book: show_all(book),
+    "birthdays": lambda args, book: show_upcoming_bitrhdays(book),
+    "add-birthday": add_birthday,
+    "show-birthday": show_birthday,
+    "hello": lambda args, book: print("How can I help you?"),
+}
+EXIT_COMMANDS = {"close", "exit"}
+
+
 def main():
     address_book = load_data()
     print("Welcome to the assistant bot!")
+    save_changes = False
             
-    while True:
-        save_changes = False
-        user_input = input("Enter a command: ")
-        command, *args = parse_input(user_input)
-
-        match command:
-            case "add":
-                add_contact(args, address_book)
-                save_changes = True
-
-            case "change":
-                change_contact(args, address_book)
-                save_changes = True
-
-            case "phone":
-                show_phone(args, address_book)
-
-            case "all":
-                show_all(address_book)
-
-            case "birthdays":
-                show_upcoming_bitrhdays(address_book)
-
-            case "add-birthday":
-                add_birthday(args, address_book)
-                save_changes = True
-            
-            case "show-birthday":
-                show_birthday(args, address_book)
-            
-            case "hello":
-                print("How can I help you?")
+    try:
+        while True:
+            user_input = input("Enter a command: ")
+            command, *args = parse_input(user_input)
 
-            case "close" | "exit":
-                save_data(address_book)
+            if command in EXIT_COMMANDS:
                 print("Good bye!")
                 break
 
-            case _:
+            handler = COMMANDS.get(command)
+            if handler is None:
                 print("Invalid command.")
+                continue
 
+            # Commands that change the book return True only when they succeed.
+            if handler(args, address_book):
+                save_changes = True
+    finally:
         if save_changes:
             save_data(address_book)
 